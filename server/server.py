@@ -1,9 +1,10 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import hashlib
 import os
+import re
 from dotenv import load_dotenv
 import opengradient as og
-from web3 import Web3
 
 # Load environment
 load_dotenv()
@@ -19,11 +20,13 @@ if not PRIVATE_KEY.startswith('0x'):
 
 client = og.Client(private_key=PRIVATE_KEY)
 
+# 0.1 OPG in wei (18 decimals), as an exact integer
+OPG_APPROVAL_AMOUNT = 10**17
+
 # Ensure approval on startup
 try:
     print("Ensuring OPG token approval...")
-    opg_amount = Web3.to_wei(0.1, 'ether')
-    approval = client.llm.ensure_opg_approval(opg_amount)
+    approval = client.llm.ensure_opg_approval(OPG_APPROVAL_AMOUNT)
     print(f"✅ Approved: {approval.tx_hash}")
 except Exception as e:
     print(f"Note: {e}")
@@ -31,6 +34,74 @@ except Exception as e:
 app = Flask(__name__)
 CORS(app)
 
+# Prebuilt rejection payloads for the common 400 paths
+ERROR_JSON_REQUIRED = {"error": "JSON body required"}
+ERROR_PROMPT_REQUIRED = {"error": "prompt required"}
+ERROR_CONTRACT_REQUIRED = {"error": "contract_code required"}
+
+# Digit runs in a field value, compiled once at import
+DIGITS_RE = re.compile(r"\d+")
+
+# Maps response labels to the numeric audit fields they fill
+AUDIT_INT_FIELDS = {
+    "SCORE": "score",
+    "CRITICAL": "critical",
+    "HIGH": "high",
+    "MEDIUM": "medium",
+}
+
+# Default audit fields, shared across requests and copied per response
+AUDIT_DEFAULTS = {
+    "score": 50,
+    "critical": 0,
+    "high": 0,
+    "medium": 0,
+    "summary": "Analysis complete"
+}
+
+# Static prompt scaffolding, built once at import
+AUDIT_SYSTEM_MESSAGE = {"role": "system", "content": "You are an expert smart contract security auditor."}
+
+AUDIT_PROMPT_TEMPLATE = """Analyze this Solidity smart contract for security vulnerabilities:
+
+{code}
+
+Check for:
+1. Reentrancy attacks
+2. Access control issues
+3. Integer overflow/underflow
+4. Unchecked external calls
+5. Front-running vulnerabilities
+
+Respond EXACTLY in this format:
+SCORE: [0-100]
+CRITICAL: [number]
+HIGH: [number]
+MEDIUM: [number]
+SUMMARY: [one line summary]
+ISSUES: [comma-separated list]"""
+
+# Successful audits keyed by contract hash, so retries of the same
+# contract don't pay for another LLM call
+AUDIT_CACHE_MAX = 256
+audit_cache = {}
+
+# Single pass over the model output, filling defaults for missing fields
+def parse_audit_response(ai_response):
+    audit = {"raw": ai_response, **AUDIT_DEFAULTS}
+    for line in ai_response.split('\n'):
+        label, sep, value = line.strip().partition(':')
+        if not sep:
+            continue
+        field = AUDIT_INT_FIELDS.get(label)
+        if field:
+            try:
+                audit[field] = int(''.join(DIGITS_RE.findall(value)))
+            except: pass
+        elif label == 'SUMMARY':
+            audit['summary'] = value.strip()
+    return audit
+
 # Health check
 @app.route("/")
 def home():
@@ -40,11 +111,15 @@ def home():
 @app.route("/ask", methods=["POST"])
 def ask_ai():
     try:
-        data = request.json
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify(ERROR_JSON_REQUIRED), 400
+
         prompt = data.get("prompt")
-        
-        if not prompt:
-            return jsonify({"error": "prompt required"}), 400
+
+        # Cheap structural check before the expensive LLM round-trip
+        if not isinstance(prompt, str) or not prompt.strip():
+            return jsonify(ERROR_PROMPT_REQUIRED), 400
         
         result = client.llm.chat(
             model="openai/gpt-4o",
@@ -63,72 +138,38 @@ def ask_ai():
 @app.route("/audit", methods=["POST"])
 def audit_contract():
     try:
-        data = request.json
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify(ERROR_JSON_REQUIRED), 400
+
         contract_code = data.get("contract_code")
+
+        # Reject bad input before building the prompt and paying the LLM round-trip
+        if not isinstance(contract_code, str) or not contract_code.strip():
+            return jsonify(ERROR_CONTRACT_REQUIRED), 400
         
-        if not contract_code:
-            return jsonify({"error": "contract_code required"}), 400
-        
-        prompt = f"""Analyze this Solidity smart contract for security vulnerabilities:
+        cache_key = hashlib.sha256(contract_code.encode()).hexdigest()
+        cached = audit_cache.get(cache_key)
+        if cached:
+            return jsonify(cached)
 
-{contract_code[:2000]}
+        prompt = AUDIT_PROMPT_TEMPLATE.format(code=contract_code[:2000])
 
-Check for:
-1. Reentrancy attacks
-2. Access control issues
-3. Integer overflow/underflow
-4. Unchecked external calls
-5. Front-running vulnerabilities
-
-Respond EXACTLY in this format:
-SCORE: [0-100]
-CRITICAL: [number]
-HIGH: [number]
-MEDIUM: [number]
-SUMMARY: [one line summary]
-ISSUES: [comma-separated list]"""
-        
         result = client.llm.chat(
             model="openai/gpt-4o",
             messages=[
-                {"role": "system", "content": "You are an expert smart contract security auditor."},
+                AUDIT_SYSTEM_MESSAGE,
                 {"role": "user", "content": prompt}
             ]
         )
         
-        ai_response = result.chat_output['content']
-        
-        # Parse response
-        audit = {
-            "raw": ai_response,
-            "score": 50,
-            "critical": 0,
-            "high": 0,
-            "medium": 0,
-            "summary": "Analysis complete"
-        }
-        
-        for line in ai_response.split('\n'):
-            line = line.strip()
-            if 'SCORE:' in line:
-                try:
-                    audit['score'] = int(''.join(filter(str.isdigit, line.split(':')[1])))
-                except: pass
-            elif 'CRITICAL:' in line:
-                try:
-                    audit['critical'] = int(''.join(filter(str.isdigit, line.split(':')[1])))
-                except: pass
-            elif 'HIGH:' in line:
-                try:
-                    audit['high'] = int(''.join(filter(str.isdigit, line.split(':')[1])))
-                except: pass
-            elif 'MEDIUM:' in line:
-                try:
-                    audit['medium'] = int(''.join(filter(str.isdigit, line.split(':')[1])))
-                except: pass
-            elif 'SUMMARY:' in line:
-                audit['summary'] = line.split(':', 1)[1].strip()
-        
+        audit = parse_audit_response(result.chat_output['content'])
+
+        # Only successful audits are cached; errors fall through to retry
+        if len(audit_cache) >= AUDIT_CACHE_MAX:
+            audit_cache.pop(next(iter(audit_cache)))
+        audit_cache[cache_key] = audit
+
         return jsonify(audit)
         
     except Exception as e: